@@ -1,12 +1,13 @@
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from decimal import Decimal, InvalidOperation
 from functools import wraps
 
 import jwt
-import mysql.connector
-from dotenv import load_dotenv
-from flask import Flask, jsonify, request
+from flask import Flask, _request_ctx_stack, g, has_app_context, jsonify, request
 from flask_bcrypt import Bcrypt
 from flask_cors import CORS
 from flask_jwt_extended import (
@@ -17,8 +18,8 @@ from flask_jwt_extended import (
     jwt_required,
 )
 
-# Load environment variables
-load_dotenv()
+from config import db_config
+from storage import DeadlineExceeded, DuplicateEntry, MySQLStorage, SQLiteStorage
 
 app = Flask(__name__)
 CORS(app)
@@ -30,67 +31,241 @@ app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(days=30)
 app.config["JWT_REFRESH_TOKEN_EXPIRES"] = timedelta(days=30)
 
 
-# Database configuration
-db_config = {
-    "host": os.getenv("DB_HOST", "localhost"),
-    "user": os.getenv("DB_USER", "root"),
-    "password": os.getenv("DB_PASSWORD", ""),
-    "database": os.getenv("DB_NAME", "finance_tracker"),
+if os.getenv("STORAGE_BACKEND", "mysql") == "sqlite":
+    storage = SQLiteStorage(os.getenv("SQLITE_PATH", ":memory:"))
+else:
+    # 32 is the most mysql.connector pools allow. Requests past it, such as
+    # the extra lanes of batches, wait for a connection until their deadline.
+    storage = MySQLStorage(
+        db_config, pool_size=int(os.getenv("DB_POOL_SIZE", "32"))
+    )
+
+
+def get_db_session():
+    deadline = g.get("deadline") if has_app_context() else None
+    check_deadline(deadline)
+
+    # Sub-requests of a batch reuse the session opened by /api/batch
+    if has_app_context() and "batch_session" in g:
+        return g.batch_session
+    return connect_db(deadline)
+
+
+def connect_db(deadline=None):
+    try:
+        db = storage.connect(deadline)
+    except DeadlineExceeded:
+        raise RequestRejected(503, "No database connection available")
+    if deadline is not None:
+        # Don't let a slow database hold the request past its deadline
+        try:
+            check_deadline(deadline)
+        except RequestRejected:
+            db.close()
+            raise
+        db.set_deadline(deadline)
+    return db
+
+
+class SharedSession:
+    """Session handed to batched sub-requests; closing it is a no-op so
+    the batch can keep using it for the next sub-request."""
+
+    def __init__(self, db):
+        self._db = db
+
+    def close(self):
+        pass
+
+    def release(self):
+        self._db.close()
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+
+# Admission control
+class RequestRejected(Exception):
+    """Raised to turn a request away early instead of letting it queue."""
+
+    def __init__(self, status, message, retry_after=1):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+
+
+def check_deadline(deadline):
+    """Return the seconds left before ``deadline``, or raise if none are."""
+    if deadline is None:
+        return None
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise RequestRejected(503, "Request deadline exceeded")
+    return remaining
+
+
+# Lower value wins: cheap reads are admitted ahead of writes, and both
+# ahead of expensive report work.
+PRIORITY_READ = 0
+PRIORITY_WRITE = 1
+PRIORITY_REPORT = 2
+
+# Share of MAX_IN_FLIGHT each priority may fill, so reports are shed first
+# and reads always keep some headroom.
+PRIORITY_SHARE = {PRIORITY_READ: 1.0, PRIORITY_WRITE: 0.75, PRIORITY_REPORT: 0.5}
+
+MAX_IN_FLIGHT = int(os.getenv("MAX_IN_FLIGHT", "32"))
+
+# Clients may ask for a shorter budget than the route's own with this header
+DEADLINE_HEADER = "X-Request-Timeout"
+
+admission_lock = threading.Condition()
+admission_state = {"in_flight": 0}
+
+
+class AdmissionGate:
+    """Concurrency limit and bounded wait queue for a single route."""
+
+    def __init__(self, priority, max_concurrent, max_queue, budget, retry_after=1):
+        self.priority = priority
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.budget = budget
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed = 0
+
+    def _can_run(self):
+        if self.in_flight >= self.max_concurrent:
+            return False
+        if admission_state["in_flight"] >= MAX_IN_FLIGHT * PRIORITY_SHARE[self.priority]:
+            return False
+        # Let queued higher-priority work take the free global capacity
+        # first, unless it is only waiting on its own route's limit
+        return not any(
+            gate.queued
+            and gate.priority < self.priority
+            and gate.in_flight < gate.max_concurrent
+            for gate in ADMISSION_GATES.values()
+        )
+
+    def _reject(self, status, message):
+        self.shed += 1
+        raise RequestRejected(status, message, self.retry_after)
+
+    def acquire(self, deadline):
+        with admission_lock:
+            if not self._can_run():
+                if self.queued >= self.max_queue:
+                    self._reject(429, "Too many requests, please retry later")
+
+                # Spend at most half the remaining budget waiting for a slot
+                queue_deadline = time.monotonic() + (deadline - time.monotonic()) / 2
+                self.queued += 1
+                try:
+                    while not self._can_run():
+                        remaining = queue_deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._reject(503, "Server is overloaded, please retry later")
+                        admission_lock.wait(remaining)
+                finally:
+                    self.queued -= 1
+                    # Lower-priority waiters may have been held back by us
+                    admission_lock.notify_all()
+
+            self.in_flight += 1
+            self.admitted += 1
+            admission_state["in_flight"] += 1
+
+    def release(self):
+        with admission_lock:
+            self.in_flight -= 1
+            admission_state["in_flight"] -= 1
+            admission_lock.notify_all()
+
+    def stats(self):
+        return {
+            "priority": self.priority,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "shed": self.shed,
+        }
+
+
+ADMISSION_GATES = {
+    "register": AdmissionGate(PRIORITY_WRITE, 4, 8, budget=5),
+    "login": AdmissionGate(PRIORITY_WRITE, 8, 16, budget=5),
+    "get_accounts": AdmissionGate(PRIORITY_READ, 16, 32, budget=3),
+    "create_account": AdmissionGate(PRIORITY_WRITE, 8, 16, budget=5),
+    "update_account": AdmissionGate(PRIORITY_WRITE, 8, 16, budget=5),
+    "delete_account": AdmissionGate(PRIORITY_WRITE, 8, 16, budget=5),
+    "get_transactions": AdmissionGate(PRIORITY_READ, 16, 32, budget=5),
+    "create_transaction": AdmissionGate(PRIORITY_WRITE, 8, 16, budget=5),
+    "delete_transaction": AdmissionGate(PRIORITY_WRITE, 8, 16, budget=5),
+    "get_dashboard_data": AdmissionGate(PRIORITY_REPORT, 4, 4, budget=10, retry_after=5),
+    "batch": AdmissionGate(PRIORITY_WRITE, 8, 16, budget=10),
 }
 
 
-def get_db_connection():
-    return mysql.connector.connect(**db_config)
+def request_budget(gate):
+    budget = gate.budget
+    requested = request.headers.get(DEADLINE_HEADER)
+    if requested:
+        try:
+            budget = min(budget, int(requested) / 1000)
+        except ValueError:
+            pass
+    return budget
+
+
+@app.before_request
+def admit_request():
+    gate = ADMISSION_GATES.get(request.endpoint)
+    if gate is None or request.method == "OPTIONS":
+        return
+
+    g.deadline = time.monotonic() + request_budget(gate)
+    gate.acquire(g.deadline)
+    # Kept on the environ rather than g: batched sub-requests share g with
+    # the batch but have their own environ and teardown.
+    request.environ["admission_gate"] = gate
+
+
+@app.teardown_request
+def release_request(exc):
+    gate = request.environ.pop("admission_gate", None)
+    if gate is not None:
+        gate.release()
+
+
+@app.errorhandler(RequestRejected)
+def handle_request_rejected(e):
+    response = jsonify({"error": e.message})
+    response.status_code = e.status
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response
+
+
+def error_response(e):
+    # A statement that ran out of budget means overload, not a server bug
+    if isinstance(e, DeadlineExceeded):
+        gate = request.environ.get("admission_gate")
+        retry_after = gate.retry_after if gate is not None else 1
+        return handle_request_rejected(
+            RequestRejected(503, "Request deadline exceeded", retry_after)
+        )
+    return jsonify({"error": str(e)}), 500
 
 
 # Initialize database
 def init_db():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    # Create users table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        username VARCHAR(50) UNIQUE NOT NULL,
-        email VARCHAR(100) UNIQUE NOT NULL,
-        password VARCHAR(255) NOT NULL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-
-    # Create accounts table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS accounts (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        user_id INT NOT NULL,
-        name VARCHAR(100) NOT NULL,
-        balance DECIMAL(15, 2) NOT NULL DEFAULT 0.00,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-    )
-    """)
-
-    # Create transactions table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS transactions (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        user_id INT NOT NULL,
-        account_id INT NOT NULL,
-        type ENUM('income', 'expense', 'transfer') NOT NULL,
-        amount DECIMAL(15, 2) NOT NULL,
-        description VARCHAR(255),
-        transfer_to_account_id INT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-        FOREIGN KEY (account_id) REFERENCES accounts(id) ON DELETE CASCADE,
-        FOREIGN KEY (transfer_to_account_id) REFERENCES accounts(id) ON DELETE SET NULL
-    )
-    """)
-
-    conn.commit()
-    cursor.close()
-    conn.close()
+    db = get_db_session()
+    db.create_tables()
+    db.close()
 
 
 # Initialize database on startup
@@ -120,26 +295,18 @@ def register():
 
     hashed_password = bcrypt.generate_password_hash(password).decode("utf-8")
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    db = get_db_session()
 
     try:
-        cursor.execute(
-            "INSERT INTO users (username, email, password) VALUES (%s, %s, %s)",
-            (username, email, hashed_password),
-        )
-        conn.commit()
-        user_id = cursor.lastrowid
+        user_id = db.users.create(username, email, hashed_password)
+        db.commit()
 
         # Create a default account for the user
-        cursor.execute(
-            "INSERT INTO accounts (user_id, name, balance) VALUES (%s, %s, %s)",
-            (user_id, "Main Account", 0.00),
-        )
-        conn.commit()
+        account_id = db.accounts.create(user_id, "Main Account", 0.00)
+        db.commit()
 
-        access_token = create_access_token(identity=user_id)
-        refresh_token = create_refresh_token(identity=user_id)
+        access_token = create_access_token(identity=str(user_id))
+        refresh_token = create_refresh_token(identity=str(user_id))
 
         return jsonify(
             {
@@ -151,18 +318,17 @@ def register():
                     "email": email,
                     "user_id": user_id,
                     "balance": 0.00,
-                    "account_id": cursor.lastrowid,
+                    "account_id": account_id,
                 },
             }
         ), 201
 
-    except mysql.connector.Error as err:
-        if err.errno == 1062:  # Duplicate entry error
-            return jsonify({"error": "Username or email already exists"}), 409
-        return jsonify({"error": str(err)}), 500
+    except DuplicateEntry:
+        return jsonify({"error": "Username or email already exists"}), 409
+    except Exception as e:
+        return error_response(e)
     finally:
-        cursor.close()
-        conn.close()
+        db.close()
 
 
 @app.route("/api/login", methods=["POST"])
@@ -174,18 +340,11 @@ def login():
     if not username_or_email or not password:
         return jsonify({"error": "All fields are required"}), 400
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    db = get_db_session()
 
     try:
         # Fetch user by username or email
-        cursor.execute(
-            "SELECT id, username, email, password FROM users WHERE username = %s OR email = %s",
-            (username_or_email, username_or_email),
-        )
-        user = cursor.fetchone()
-        # Consume any remaining results
-        cursor.fetchall()
+        user = db.users.find_by_login(username_or_email)
 
         if not user or not bcrypt.check_password_hash(user["password"], password):
             return jsonify({"error": "Invalid credentials"}), 401
@@ -193,12 +352,7 @@ def login():
         print(f"User found: {user['username']}")
 
         # Fetch user's account
-        cursor.execute(
-            "SELECT id, balance FROM accounts WHERE user_id = %s", (user["id"],)
-        )
-        account = cursor.fetchone()
-        # Consume any remaining results
-        cursor.fetchall()
+        account = db.accounts.first_for_user(user["id"])
 
         # Generate JWT tokens
         access_token = create_access_token(identity=str(user["id"]))
@@ -220,10 +374,9 @@ def login():
         ), 200
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return error_response(e)
     finally:
-        cursor.close()
-        conn.close()
+        db.close()
 
 
 # Account routes
@@ -232,15 +385,10 @@ def login():
 def get_accounts():
     user_id = get_jwt_identity()
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    db = get_db_session()
 
     try:
-        cursor.execute(
-            "SELECT id, name, balance, created_at FROM accounts WHERE user_id = %s",
-            (user_id,),
-        )
-        accounts = cursor.fetchall()
+        accounts = db.accounts.list_for_user(user_id)
         # Convert Decimal to float for balance
         for account in accounts:
             if isinstance(account["balance"], Decimal):
@@ -248,10 +396,9 @@ def get_accounts():
 
         return jsonify({"accounts": accounts}), 200
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return error_response(e)
     finally:
-        cursor.close()
-        conn.close()
+        db.close()
 
 
 @app.route("/api/accounts", methods=["POST"])
@@ -271,34 +418,26 @@ def create_account():
     except InvalidOperation:
         return jsonify({"error": "Invalid balance value"}), 400
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    db = get_db_session()
 
     try:
-        cursor.execute(
-            "INSERT INTO accounts (user_id, name, balance) VALUES (%s, %s, %s)",
-            (user_id, name, initial_balance),
-        )
-        conn.commit()
-
-        account_id = cursor.lastrowid
+        account_id = db.accounts.create(user_id, name, initial_balance)
+        db.commit()
 
         if initial_balance > 0:
             # Create initial deposit transaction
-            cursor.execute(
-                "INSERT INTO transactions (user_id, account_id, type, amount, description) VALUES (%s, %s, %s, %s, %s)",
-                (user_id, account_id, "income", initial_balance, "Initial balance"),
+            db.transactions.create(
+                user_id, account_id, "income", initial_balance, "Initial balance"
             )
-            conn.commit()
+            db.commit()
 
         return jsonify(
             {"message": "Account created successfully", "account_id": account_id}
         ), 201
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return error_response(e)
     finally:
-        cursor.close()
-        conn.close()
+        db.close()
 
 
 @app.route("/api/accounts/<int:account_id>", methods=["PUT"])
@@ -311,25 +450,20 @@ def update_account(account_id):
     if not name:
         return jsonify({"error": "Account name is required"}), 400
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    db = get_db_session()
 
     try:
-        cursor.execute(
-            "UPDATE accounts SET name = %s WHERE id = %s AND user_id = %s",
-            (name, account_id, user_id),
-        )
-        conn.commit()
+        updated = db.accounts.rename(account_id, user_id, name)
+        db.commit()
 
-        if cursor.rowcount == 0:
+        if updated == 0:
             return jsonify({"error": "Account not found or not authorized"}), 404
 
         return jsonify({"message": "Account updated successfully"}), 200
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return error_response(e)
     finally:
-        cursor.close()
-        conn.close()
+        db.close()
 
 
 @app.route("/api/accounts/<int:account_id>", methods=["DELETE"])
@@ -337,24 +471,20 @@ def update_account(account_id):
 def delete_account(account_id):
     user_id = get_jwt_identity()
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    db = get_db_session()
 
     try:
-        cursor.execute(
-            "DELETE FROM accounts WHERE id = %s AND user_id = %s", (account_id, user_id)
-        )
-        conn.commit()
+        deleted = db.accounts.delete(account_id, user_id)
+        db.commit()
 
-        if cursor.rowcount == 0:
+        if deleted == 0:
             return jsonify({"error": "Account not found or not authorized"}), 404
 
         return jsonify({"message": "Account deleted successfully"}), 200
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return error_response(e)
     finally:
-        cursor.close()
-        conn.close()
+        db.close()
 
 @app.route("/api/transactions", methods=["GET"])
 @jwt_required()
@@ -362,44 +492,15 @@ def get_transactions():
     user_id = get_jwt_identity()
     account_id = request.args.get("account_id")
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    db = get_db_session()
 
     try:
-        if account_id:
-            cursor.execute(
-                """
-                SELECT t.*, a.name as account_name,
-                CASE WHEN t.transfer_to_account_id IS NOT NULL THEN a2.name ELSE NULL END as transfer_to_account_name
-                FROM transactions t
-                JOIN accounts a ON t.account_id = a.id
-                LEFT JOIN accounts a2 ON t.transfer_to_account_id = a2.id
-                WHERE t.user_id = %s AND t.account_id = %s
-                ORDER BY t.created_at DESC
-                """,
-                (user_id, account_id),
-            )
-        else:
-            cursor.execute(
-                """
-                SELECT t.*, a.name as account_name,
-                CASE WHEN t.transfer_to_account_id IS NOT NULL THEN a2.name ELSE NULL END as transfer_to_account_name
-                FROM transactions t
-                JOIN accounts a ON t.account_id = a.id
-                LEFT JOIN accounts a2 ON t.transfer_to_account_id = a2.id
-                WHERE t.user_id = %s
-                ORDER BY t.created_at DESC
-                """,
-                (user_id,),
-            )
-
-        transactions = cursor.fetchall()
+        transactions = db.transactions.list_for_user(user_id, account_id)
         return jsonify({"transactions": convert_decimal(transactions)}), 200
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return error_response(e)
     finally:
-        cursor.close()
-        conn.close()
+        db.close()
 
 from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
@@ -433,34 +534,25 @@ def create_transaction():
     except (InvalidOperation, ValueError):
         return jsonify({"error": "Invalid amount"}), 400
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    db = get_db_session()
 
     try:
         # Start transaction
-        conn.start_transaction()
+        db.begin()
 
         # Verify account ownership
-        cursor.execute(
-            "SELECT id, balance FROM accounts WHERE id = %s AND user_id = %s",
-            (account_id, user_id),
-        )
-        account = cursor.fetchone()
+        account = db.accounts.get_owned(account_id, user_id)
 
         if not account:
-            conn.rollback()
+            db.rollback()
             return jsonify({"error": "Account not found or not authorized"}), 404
 
         # For transfers, verify the destination account
         if transaction_type == "transfer":
-            cursor.execute(
-                "SELECT id FROM accounts WHERE id = %s AND user_id = %s",
-                (transfer_to_account_id, user_id),
-            )
-            destination_account = cursor.fetchone()
+            destination_account = db.accounts.get_owned(transfer_to_account_id, user_id)
 
             if not destination_account:
-                conn.rollback()
+                db.rollback()
                 return jsonify(
                     {"error": "Destination account not found or not authorized"}
                 ), 404
@@ -468,56 +560,35 @@ def create_transaction():
         # Update balances
         if transaction_type == "income":
             new_balance = account["balance"] + amount
-            cursor.execute(
-                "UPDATE accounts SET balance = %s WHERE id = %s",
-                (new_balance, account_id),
-            )
+            db.accounts.set_balance(account_id, new_balance)
         elif transaction_type == "expense":
             if account["balance"] < amount:
-                conn.rollback()
+                db.rollback()
                 return jsonify({"error": "Insufficient funds"}), 400
 
             new_balance = account["balance"] - amount
-            cursor.execute(
-                "UPDATE accounts SET balance = %s WHERE id = %s",
-                (new_balance, account_id),
-            )
+            db.accounts.set_balance(account_id, new_balance)
         elif transaction_type == "transfer":
             if account["balance"] < amount:
-                conn.rollback()
+                db.rollback()
                 return jsonify({"error": "Insufficient funds for transfer"}), 400
 
             # Deduct from source account
-            cursor.execute(
-                "UPDATE accounts SET balance = balance - %s WHERE id = %s",
-                (amount, account_id),
-            )
+            db.accounts.adjust_balance(account_id, -amount)
 
             # Add to destination account
-            cursor.execute(
-                "UPDATE accounts SET balance = balance + %s WHERE id = %s",
-                (amount, transfer_to_account_id),
-            )
+            db.accounts.adjust_balance(transfer_to_account_id, amount)
 
         # Insert transaction
-        cursor.execute(
-            """
-            INSERT INTO transactions
-            (user_id, account_id, type, amount, description, transfer_to_account_id)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            """,
-            (
-                user_id,
-                account_id,
-                transaction_type,
-                amount,
-                description,
-                transfer_to_account_id if transaction_type == "transfer" else None,
-            ),
+        transaction_id = db.transactions.create(
+            user_id,
+            account_id,
+            transaction_type,
+            amount,
+            description,
+            transfer_to_account_id if transaction_type == "transfer" else None,
         )
-
-        transaction_id = cursor.lastrowid
-        conn.commit()
+        db.commit()
 
         return jsonify({
             "message": "Transaction created successfully",
@@ -525,11 +596,10 @@ def create_transaction():
         }), 201
 
     except Exception as e:
-        conn.rollback()
-        return jsonify({"error": str(e)}), 500
+        db.rollback()
+        return error_response(e)
     finally:
-        cursor.close()
-        conn.close()
+        db.close()
 
 
 @app.route("/api/transactions/<int:transaction_id>", methods=["DELETE"])
@@ -537,86 +607,63 @@ def create_transaction():
 def delete_transaction(transaction_id):
     user_id = get_jwt_identity()
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    db = get_db_session()
 
     try:
         # Start transaction
-        conn.start_transaction()
+        db.begin()
 
         # Get transaction details
-        cursor.execute(
-            """
-            SELECT t.*, a.balance as source_balance,
-            CASE WHEN t.transfer_to_account_id IS NOT NULL THEN a2.balance ELSE NULL END as dest_balance
-            FROM transactions t
-            JOIN accounts a ON t.account_id = a.id
-            LEFT JOIN accounts a2 ON t.transfer_to_account_id = a2.id
-            WHERE t.id = %s AND t.user_id = %s
-            """,
-            (transaction_id, user_id),
-        )
-        transaction = cursor.fetchone()
+        transaction = db.transactions.get_with_balances(transaction_id, user_id)
 
         if not transaction:
-            conn.rollback()
+            db.rollback()
             return jsonify({"error": "Transaction not found or not authorized"}), 404
 
         # Reverse the transaction effect on balances
         if transaction["type"] == "income":
             # Deduct the amount from the account
             if transaction["source_balance"] < transaction["amount"]:
-                conn.rollback()
+                db.rollback()
                 return jsonify(
                     {
                         "error": "Cannot delete transaction: would result in negative balance"
                     }
                 ), 400
 
-            cursor.execute(
-                "UPDATE accounts SET balance = balance - %s WHERE id = %s",
-                (transaction["amount"], transaction["account_id"]),
-            )
+            db.accounts.adjust_balance(transaction["account_id"], -transaction["amount"])
         elif transaction["type"] == "expense":
             # Add the amount back to the account
-            cursor.execute(
-                "UPDATE accounts SET balance = balance + %s WHERE id = %s",
-                (transaction["amount"], transaction["account_id"]),
-            )
+            db.accounts.adjust_balance(transaction["account_id"], transaction["amount"])
         elif transaction["type"] == "transfer":
             # Add back to source account
-            cursor.execute(
-                "UPDATE accounts SET balance = balance + %s WHERE id = %s",
-                (transaction["amount"], transaction["account_id"]),
-            )
+            db.accounts.adjust_balance(transaction["account_id"], transaction["amount"])
 
             # Deduct from destination account
             if transaction["dest_balance"] < transaction["amount"]:
-                conn.rollback()
+                db.rollback()
                 return jsonify(
                     {
                         "error": "Cannot delete transaction: would result in negative balance in destination account"
                     }
                 ), 400
 
-            cursor.execute(
-                "UPDATE accounts SET balance = balance - %s WHERE id = %s",
-                (transaction["amount"], transaction["transfer_to_account_id"]),
+            db.accounts.adjust_balance(
+                transaction["transfer_to_account_id"], -transaction["amount"]
             )
 
         # Delete the transaction
-        cursor.execute("DELETE FROM transactions WHERE id = %s", (transaction_id,))
+        db.transactions.delete(transaction_id)
 
         # Commit transaction
-        conn.commit()
+        db.commit()
 
         return jsonify({"message": "Transaction deleted successfully"}), 200
     except Exception as e:
-        conn.rollback()
-        return jsonify({"error": str(e)}), 500
+        db.rollback()
+        return error_response(e)
     finally:
-        cursor.close()
-        conn.close()
+        db.close()
 
 
 # Dashboard data
@@ -626,45 +673,24 @@ def get_dashboard_data():
     print(get_jwt_identity())
     user_id = str(get_jwt_identity())
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    db = get_db_session()
 
     try:
         # Get accounts summary
-        cursor.execute(
-            "SELECT id, name, balance FROM accounts WHERE user_id = %s", (user_id,)
-        )
-        accounts = cursor.fetchall()
+        accounts = db.accounts.list_for_user(user_id)
         # Convert Decimal to float in accounts
         for account in accounts:
             if isinstance(account["balance"], Decimal):
                 account["balance"] = float(account["balance"])
 
         # Get total balance
-        cursor.execute(
-            "SELECT SUM(balance) as total_balance FROM accounts WHERE user_id = %s",
-            (user_id,),
-        )
-        total_balance = cursor.fetchone()["total_balance"] or 0
+        total_balance = db.accounts.total_balance(user_id) or 0
         # Convert Decimal to float for total_balance
         if isinstance(total_balance, Decimal):
             total_balance = float(total_balance)
 
         # Get recent transactions
-        cursor.execute(
-            """
-            SELECT t.*, a.name as account_name,
-            CASE WHEN t.transfer_to_account_id IS NOT NULL THEN a2.name ELSE NULL END as transfer_to_account_name
-            FROM transactions t
-            JOIN accounts a ON t.account_id = a.id
-            LEFT JOIN accounts a2 ON t.transfer_to_account_id = a2.id
-            WHERE t.user_id = %s
-            ORDER BY t.created_at DESC
-            LIMIT 5
-            """,
-            (user_id,),
-        )
-        recent_transactions = cursor.fetchall()
+        recent_transactions = db.transactions.recent_for_user(user_id, 5)
         # Convert Decimal to float in transactions (e.g., amount)
         for transaction in recent_transactions:
             for key, value in transaction.items():
@@ -672,22 +698,7 @@ def get_dashboard_data():
                     transaction[key] = float(value)
 
         # Get monthly income/expense summary
-        cursor.execute(
-            """
-            SELECT
-                MONTH(created_at) as month,
-                YEAR(created_at) as year,
-                type,
-                SUM(amount) as total
-            FROM transactions
-            WHERE user_id = %s AND type IN ('income', 'expense')
-            GROUP BY YEAR(created_at), MONTH(created_at), type
-            ORDER BY YEAR(created_at) DESC, MONTH(created_at) DESC
-            LIMIT 12
-            """,
-            (user_id,),
-        )
-        monthly_summary = cursor.fetchall()
+        monthly_summary = db.transactions.monthly_summary(user_id)
         # Convert Decimal to float in monthly_summary
         for summary in monthly_summary:
             if isinstance(summary["total"], Decimal):
@@ -701,11 +712,221 @@ def get_dashboard_data():
                 "monthly_summary": monthly_summary,
             }
         ), 200
+    except Exception as e:
+        return error_response(e)
+    finally:
+        db.close()
+
+
+# Batch requests
+BATCH_MAX_REQUESTS = 20
+BATCH_MAX_WORKERS = 4
+
+# Shared by all batches so a burst of batches can't spawn unbounded threads.
+# Lanes never submit work themselves, so a full pool only delays them.
+batch_executor = ThreadPoolExecutor(max_workers=4 * BATCH_MAX_WORKERS)
+
+# Routes that may be called from inside a batch. All of them are
+# protected by @jwt_required, which the batch verifies once up front.
+BATCH_ENDPOINTS = {
+    "get_accounts",
+    "create_account",
+    "update_account",
+    "delete_account",
+    "get_transactions",
+    "create_transaction",
+    "delete_transaction",
+    "get_dashboard_data",
+}
+
+JWT_CONTEXT_ATTRS = ("jwt", "jwt_header", "jwt_user", "jwt_location")
+
+
+def sub_request_error(e):
+    if isinstance(e, RequestRejected):
+        return {
+            "status": e.status,
+            "body": {"error": e.message},
+            "retry_after": e.retry_after,
+        }
+    return {"status": 500, "body": {"error": str(e)}}
+
+
+def run_sub_request(sub_request, jwt_context, deadline, db):
+    method = sub_request["method"]
+    path = sub_request["path"]
+
+    with app.test_request_context(path, method=method, json=sub_request.get("body")):
+        # Reuse the token verified by /api/batch instead of decoding it again
+        for attr, value in jwt_context.items():
+            setattr(_request_ctx_stack.top, attr, value)
+
+        if request.routing_exception is not None:
+            err = request.routing_exception
+            return {"status": err.code, "body": {"error": err.description}}
+
+        endpoint = request.url_rule.endpoint
+        if endpoint not in BATCH_ENDPOINTS:
+            return {"status": 400, "body": {"error": "Route not allowed in batch"}}
+
+        # Sub-requests go through their route's own gate and get no more
+        # time than the route would on its own, so a batch can't run more
+        # report work, or longer statements, than calling the route directly.
+        # release_request() releases the gate when this context is torn down.
+        gate = ADMISSION_GATES.get(endpoint)
+        if gate is not None:
+            route_deadline = time.monotonic() + request_budget(gate)
+            if deadline is not None:
+                route_deadline = min(deadline, route_deadline)
+            deadline = route_deadline
+            try:
+                gate.acquire(deadline)
+            except RequestRejected as e:
+                return sub_request_error(e)
+            request.environ["admission_gate"] = gate
+
+        g.deadline = deadline
+        g.batch_session = db
+        try:
+            if deadline is not None:
+                db.set_deadline(deadline)
+            view = app.view_functions[endpoint].__wrapped__
+            response = app.make_response(view(**request.view_args))
+        except Exception as e:
+            # Report it in this entry; earlier sub-requests may have committed
+            return sub_request_error(e)
+        finally:
+            g.pop("batch_session", None)
+            # Views commit their own work. Whatever is left open, such as the
+            # implicit transaction a SELECT starts, must not leak into the
+            # next sub-request on this session.
+            try:
+                db.rollback()
+            except Exception:
+                # The entry's result stands; if the session is broken, the
+                # sub-requests after it fail on their own
+                pass
+
+        result = {"status": response.status_code, "body": response.get_json()}
+        if "Retry-After" in response.headers:
+            result["retry_after"] = int(response.headers["Retry-After"])
+        return result
+
+
+def run_sub_request_lane(sub_requests, jwt_context, deadline, db=None):
+    # Each parallel lane runs its share of sub-requests on one session
+    owns_db = db is None
+    if owns_db:
+        try:
+            db = SharedSession(connect_db(deadline))
+        except Exception as e:
+            # Writes earlier in the batch may have committed already, so
+            # this lane's entries fail rather than the whole batch
+            return [sub_request_error(e) for _ in sub_requests]
+    try:
+        return [
+            run_sub_request(sub, jwt_context, deadline, db) for sub in sub_requests
+        ]
+    finally:
+        if owns_db:
+            db.release()
+
+
+@app.route("/api/batch", methods=["POST"])
+@jwt_required()
+def batch():
+    data = request.get_json(silent=True)
+    sub_requests = data.get("requests") if isinstance(data, dict) else None
+
+    if not isinstance(sub_requests, list) or not sub_requests:
+        return jsonify({"error": "A non-empty list of requests is required"}), 400
+
+    if len(sub_requests) > BATCH_MAX_REQUESTS:
+        return jsonify(
+            {"error": f"A batch may contain at most {BATCH_MAX_REQUESTS} requests"}
+        ), 400
+
+    for index, sub in enumerate(sub_requests):
+        if not isinstance(sub, dict) or not isinstance(sub.get("path"), str):
+            return jsonify({"error": f"Request {index} must have a path"}), 400
+        sub["method"] = str(sub.get("method", "GET")).upper()
+
+    jwt_context = {
+        attr: getattr(_request_ctx_stack.top, attr) for attr in JWT_CONTEXT_ATTRS
+    }
+    deadline = g.get("deadline")
+    results = [None] * len(sub_requests)
+
+    db = SharedSession(get_db_session())
+
+    try:
+        index = 0
+        while index < len(sub_requests):
+            if sub_requests[index]["method"] != "GET":
+                # Writes run one at a time, in order, on the shared session
+                results[index] = run_sub_request(
+                    sub_requests[index], jwt_context, deadline, db
+                )
+                index += 1
+                continue
+
+            # Consecutive reads are independent of each other, run them in parallel
+            end = index
+            while end < len(sub_requests) and sub_requests[end]["method"] == "GET":
+                end += 1
+            reads = list(range(index, end))
+            workers = min(BATCH_MAX_WORKERS, len(reads))
+
+            lanes = [reads[lane::workers] for lane in range(workers)]
+
+            futures = [
+                batch_executor.submit(
+                    run_sub_request_lane,
+                    [sub_requests[i] for i in lane],
+                    jwt_context,
+                    deadline,
+                )
+                for lane in lanes[1:]
+            ]
+            # The first lane runs here on the batch's own session
+            lane_results = [
+                run_sub_request_lane(
+                    [sub_requests[i] for i in lanes[0]],
+                    jwt_context,
+                    deadline,
+                    db,
+                )
+            ]
+            lane_results += [future.result() for future in futures]
+
+            for lane, lane_result in zip(lanes, lane_results):
+                for i, result in zip(lane, lane_result):
+                    results[i] = result
+
+            index = end
+
+        return jsonify({"responses": results}), 200
+    except RequestRejected:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
-        cursor.close()
-        conn.close()
+        db.release()
+
+
+# Admission stats, left outside admission control so it answers under overload
+@app.route("/api/admission", methods=["GET"])
+def admission_stats():
+    with admission_lock:
+        return jsonify(
+            {
+                "in_flight": admission_state["in_flight"],
+                "max_in_flight": MAX_IN_FLIGHT,
+                "routes": {
+                    endpoint: gate.stats() for endpoint, gate in ADMISSION_GATES.items()
+                },
+            }
+        ), 200
 
 
 if __name__ == "__main__":
@@ -0,0 +1,140 @@
+import json
+import os
+import statistics
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Compares page-load latency of the Transactions page: the old fan-out (one
+# request per resource, issued in parallel like Promise.all) versus a single
+# POST /api/batch.
+#
+#   python bench_batch.py [--seed] <username> <password> [iterations]
+#   python bench_batch.py --in-process [iterations]
+#
+# The first form runs against a server at API_URL, over HTTP; --seed
+# registers the user and gives it 200 transactions first. The second runs
+# the app in this process on the in-memory SQLite storage with a seeded user,
+# so it needs no server or MySQL, but it has no HTTP round trips either.
+
+API_URL = os.getenv("API_URL", "http://localhost:5000/api")
+
+PAGE_REQUESTS = [
+    {"method": "GET", "path": "/api/accounts"},
+    {"method": "GET", "path": "/api/transactions"},
+]
+
+
+def http_call(method, path, token=None, body=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    req = urllib.request.Request(API_URL + path, data=data, method=method)
+    req.add_header("Content-Type", "application/json")
+    if token:
+        req.add_header("Authorization", f"Bearer {token}")
+    with urllib.request.urlopen(req) as response:
+        return json.loads(response.read())
+
+
+def in_process_call():
+    os.environ["STORAGE_BACKEND"] = "sqlite"
+    from app import app
+
+    client = app.test_client()
+
+    def call(method, path, token=None, body=None):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        response = client.open("/api" + path, method=method, json=body, headers=headers)
+        return response.get_json()
+
+    return call
+
+
+def seed(call, username, password, transactions=200):
+    call(
+        "POST",
+        "/register",
+        body={
+            "username": username,
+            "email": f"{username}@example.com",
+            "password": password,
+        },
+    )
+    token = login(call, username, password)
+    account = call(
+        "POST", "/accounts", token, {"name": "Savings", "balance": "1000000"}
+    )
+    for i in range(transactions):
+        call(
+            "POST",
+            "/transactions",
+            token,
+            {
+                "account_id": account["account_id"],
+                "type": "expense",
+                "amount": "1.25",
+                "description": f"Expense {i}",
+            },
+        )
+
+
+def login(call, username, password):
+    response = call(
+        "POST", "/login", body={"username": username, "password": password}
+    )
+    return response["tokens"]["access"]
+
+
+def load_fan_out(call, token, executor):
+    futures = [
+        executor.submit(call, sub["method"], sub["path"][len("/api"):], token)
+        for sub in PAGE_REQUESTS
+    ]
+    return [future.result() for future in futures]
+
+
+def load_batch(call, token, executor):
+    return call("POST", "/batch", token, {"requests": PAGE_REQUESTS})
+
+
+def measure(load, call, token, iterations):
+    timings = []
+    with ThreadPoolExecutor(max_workers=len(PAGE_REQUESTS)) as executor:
+        load(call, token, executor)  # warm up
+        for _ in range(iterations):
+            start = time.perf_counter()
+            load(call, token, executor)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "median_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 2),
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--in-process":
+        call = in_process_call()
+        username, password = "bench", "bench-password"
+        iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+        seed(call, username, password)
+    elif len(sys.argv) >= 3:
+        call = http_call
+        args = sys.argv[1:]
+        seeded = args[0] == "--seed"
+        if seeded:
+            args = args[1:]
+        username, password = args[0], args[1]
+        iterations = int(args[2]) if len(args) > 2 else 50
+        if seeded:
+            seed(call, username, password)
+    else:
+        sys.exit(
+            "usage: python bench_batch.py [--seed] <username> <password> [iterations]\n"
+            "       python bench_batch.py --in-process [iterations]"
+        )
+
+    token = login(call, username, password)
+
+    print("fan-out:", measure(load_fan_out, call, token, iterations))
+    print("batch:  ", measure(load_batch, call, token, iterations))
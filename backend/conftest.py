@@ -0,0 +1,22 @@
+import os
+
+import pytest
+
+# Tests run the API in-process on the in-memory SQLite storage; this has to
+# be set before app.py is first imported.
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-for-the-api-tests")
+
+
+@pytest.fixture
+def reset_admission():
+    from app import ADMISSION_GATES, admission_state
+
+    def reset():
+        admission_state["in_flight"] = 0
+        for gate in ADMISSION_GATES.values():
+            gate.in_flight = gate.queued = gate.admitted = gate.shed = 0
+
+    reset()
+    yield
+    reset()
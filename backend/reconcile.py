@@ -0,0 +1,302 @@
+import argparse
+import sys
+import time
+from decimal import Decimal
+
+import mysql.connector
+import numpy as np
+
+from config import db_config
+
+# Offline check that every accounts.balance equals the sum of its income,
+# expense and transfer rows, plus a scan for rows that should not exist.
+#
+#   python reconcile.py [--chunk-size N]
+#                       [--repair [--include-surplus] [--include-negative]]
+#
+# The transaction table is streamed in primary-key order, one chunk at a
+# time, into NumPy arrays; balances are accumulated per account with
+# vectorized sums. Memory is bounded by the chunk size plus a few integers
+# per account id, whatever the number of transactions.
+#
+# Amounts are handled as integer cents so sums are exact.
+#
+# Deleting an account cascades away the transfers it sent, so the accounts
+# that received them hold more than their remaining rows add up to. That
+# surplus is expected, and --repair leaves such accounts alone unless
+# --include-surplus is given. Accounts whose rows add up to a negative
+# balance are left alone too, unless --include-negative is given.
+
+TYPE_INCOME = 1
+TYPE_EXPENSE = 2
+TYPE_TRANSFER = 3
+
+ANOMALIES = {
+    "owner_mismatch": "transaction user differs from the account owner",
+    "cross_user_transfer": "transfer into an account owned by another user",
+    "self_transfer": "transfer into the source account",
+    "orphan_transfer": "transfer whose destination account no longer exists",
+    "non_positive_amount": "amount is zero or negative",
+}
+
+ACCOUNTS_CHUNK_QUERY = """
+    SELECT id, user_id, CAST(balance * 100 AS SIGNED)
+    FROM accounts
+    WHERE id > %s
+    ORDER BY id
+    LIMIT %s
+"""
+
+TRANSACTIONS_CHUNK_QUERY = """
+    SELECT
+        id,
+        user_id,
+        account_id,
+        COALESCE(transfer_to_account_id, 0),
+        CASE type
+            WHEN 'income' THEN 1
+            WHEN 'expense' THEN 2
+            WHEN 'transfer' THEN 3
+        END,
+        CAST(amount * 100 AS SIGNED)
+    FROM transactions
+    WHERE id > %s
+    ORDER BY id
+    LIMIT %s
+"""
+
+
+def fetch_chunks(cursor, query, chunk_size, columns):
+    """Yield (rows, columns) int64 arrays, paging on the id in column 0."""
+    last_id = 0
+    while True:
+        cursor.execute(query, (last_id, chunk_size))
+        rows = cursor.fetchall()
+        if not rows:
+            return
+        chunk = np.array(rows, dtype=np.int64).reshape(len(rows), columns)
+        last_id = int(chunk[-1, 0])
+        yield chunk
+
+
+class Reconciliation:
+    def __init__(self, max_account_id, sample_size):
+        size = max_account_id + 1
+        self.exists = np.zeros(size, dtype=bool)
+        self.owner = np.zeros(size, dtype=np.int64)
+        self.recorded = np.zeros(size, dtype=np.int64)
+        self.expected = np.zeros(size, dtype=np.int64)
+        self.sample_size = sample_size
+        self.anomaly_counts = {name: 0 for name in ANOMALIES}
+        self.anomaly_samples = {name: [] for name in ANOMALIES}
+        self.transaction_count = 0
+
+    def add_accounts(self, chunk):
+        ids = chunk[:, 0]
+        self.exists[ids] = True
+        self.owner[ids] = chunk[:, 1]
+        self.recorded[ids] = chunk[:, 2]
+
+    def add_transactions(self, chunk):
+        ids, user_ids, account_ids, dest_ids, types, amounts = chunk.T
+        self.transaction_count += len(chunk)
+
+        # Income credits the account; expenses and transfers debit it
+        signed = np.where(types == TYPE_INCOME, amounts, -amounts)
+        np.add.at(self.expected, account_ids, signed)
+
+        incoming = (types == TYPE_TRANSFER) & (dest_ids > 0)
+        np.add.at(self.expected, dest_ids[incoming], amounts[incoming])
+
+        transfers = types == TYPE_TRANSFER
+        self._flag("owner_mismatch", ids, self.owner[account_ids] != user_ids)
+        self._flag(
+            "cross_user_transfer",
+            ids,
+            incoming & (self.owner[dest_ids] != user_ids),
+        )
+        self._flag("self_transfer", ids, transfers & (dest_ids == account_ids))
+        self._flag("orphan_transfer", ids, transfers & (dest_ids == 0))
+        self._flag("non_positive_amount", ids, amounts <= 0)
+
+    def _flag(self, name, ids, mask):
+        flagged = ids[mask]
+        self.anomaly_counts[name] += len(flagged)
+        room = self.sample_size - len(self.anomaly_samples[name])
+        if room > 0:
+            self.anomaly_samples[name].extend(flagged[:room].tolist())
+
+    def mismatches(self):
+        """Return (account_ids, recorded, expected) for mismatched accounts."""
+        ids = np.flatnonzero(self.exists & (self.recorded != self.expected))
+        return ids, self.recorded[ids], self.expected[ids]
+
+    def negative_accounts(self):
+        return np.flatnonzero(self.exists & (self.expected < 0))
+
+
+def format_cents(cents):
+    return str(Decimal(int(cents)).scaleb(-2))
+
+
+def scan(conn, chunk_size, sample_size):
+    cursor = conn.cursor()
+    try:
+        # Read accounts and transactions from one snapshot so writes that
+        # land during the scan can't show up as false mismatches.
+        cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM accounts")
+        max_account_id = cursor.fetchone()[0]
+        result = Reconciliation(max_account_id, sample_size)
+
+        for chunk in fetch_chunks(cursor, ACCOUNTS_CHUNK_QUERY, chunk_size, 3):
+            result.add_accounts(chunk)
+        for chunk in fetch_chunks(cursor, TRANSACTIONS_CHUNK_QUERY, chunk_size, 6):
+            result.add_transactions(chunk)
+
+        conn.commit()
+        return result
+    finally:
+        cursor.close()
+
+
+CREATE_ADJUSTMENTS = """
+    CREATE TABLE IF NOT EXISTS balance_adjustments (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        account_id INT NOT NULL,
+        old_balance DECIMAL(15, 2) NOT NULL,
+        new_balance DECIMAL(15, 2) NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+RECORD_ADJUSTMENT = """
+    INSERT INTO balance_adjustments (account_id, old_balance, new_balance)
+    VALUES (%s, %s, %s)
+"""
+
+
+def repair(conn, ids, recorded, expected, batch_size=1000):
+    """Set mismatched balances to their expected value.
+
+    An account is only updated if its balance is still the one seen by the
+    scan; anything that moved since is left for the next run. Every update
+    is recorded in balance_adjustments, in the same transaction, and
+    printed. Returns the number of accounts repaired.
+    """
+    cursor = conn.cursor()
+    repaired = 0
+    try:
+        cursor.execute(CREATE_ADJUSTMENTS)
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            for i, r, e in zip(ids[start:end], recorded[start:end], expected[start:end]):
+                old_balance, new_balance = format_cents(r), format_cents(e)
+                cursor.execute(
+                    "UPDATE accounts SET balance = %s WHERE id = %s AND balance = %s",
+                    (new_balance, int(i), old_balance),
+                )
+                if cursor.rowcount:
+                    cursor.execute(
+                        RECORD_ADJUSTMENT, (int(i), old_balance, new_balance)
+                    )
+                    print(f"  adjusted account {i}: {old_balance} -> {new_balance}")
+                    repaired += 1
+            conn.commit()
+        return repaired
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Recompute account balances from transactions and report mismatches."
+    )
+    parser.add_argument("--chunk-size", type=int, default=200_000)
+    parser.add_argument(
+        "--repair", action="store_true", help="update mismatched balances"
+    )
+    parser.add_argument(
+        "--include-surplus",
+        action="store_true",
+        help="also repair accounts holding more than their rows add up to",
+    )
+    parser.add_argument(
+        "--include-negative",
+        action="store_true",
+        help="also repair accounts whose expected balance is negative",
+    )
+    parser.add_argument(
+        "--limit", type=int, default=20, help="mismatches and anomaly ids to print"
+    )
+    args = parser.parse_args(argv)
+
+    conn = mysql.connector.connect(**db_config)
+    try:
+        started = time.perf_counter()
+        result = scan(conn, args.chunk_size, args.limit)
+        elapsed = time.perf_counter() - started
+
+        ids, recorded, expected = result.mismatches()
+        print(
+            f"Scanned {result.transaction_count} transactions and "
+            f"{int(result.exists.sum())} accounts in {elapsed:.1f}s"
+        )
+        print(f"Balance mismatches: {len(ids)}")
+        limit = args.limit
+        for i, r, e in zip(ids[:limit], recorded[:limit], expected[:limit]):
+            print(
+                f"  account {i}: recorded {format_cents(r)}, "
+                f"expected {format_cents(e)}, difference {format_cents(r - e)}"
+            )
+
+        negative = result.negative_accounts()
+        print(f"Accounts with a negative expected balance: {len(negative)}")
+        if len(negative):
+            print("  accounts:", negative[:limit].tolist())
+
+        for name, description in ANOMALIES.items():
+            count = result.anomaly_counts[name]
+            print(f"{description}: {count}")
+            if count:
+                print("  transactions:", result.anomaly_samples[name])
+
+        if args.repair and len(ids):
+            fix = np.ones(len(ids), dtype=bool)
+            surplus = recorded > expected
+            if not args.include_surplus and surplus.any():
+                # Likely transfers from a since-deleted account; taking the
+                # money back would undo credits the user really received
+                print(
+                    f"Skipping {int(surplus.sum())} accounts with a surplus, "
+                    "which deleted source accounts can cause; "
+                    "use --include-surplus to repair them too"
+                )
+                fix &= ~surplus
+            negative = expected < 0
+            if not args.include_negative and negative.any():
+                # The API never lets a balance go negative, so rows are
+                # missing or wrong; writing the sum back would hide that
+                print(
+                    f"Skipping {int(negative.sum())} accounts whose expected "
+                    "balance is negative, which points to lost or corrupt rows; "
+                    "use --include-negative to repair them too"
+                )
+                fix &= ~negative
+
+            repaired = repair(conn, ids[fix], recorded[fix], expected[fix])
+            print(f"Repaired {repaired} of {len(ids)} accounts")
+            return 0 if repaired == len(ids) else 1
+
+        return 1 if len(ids) else 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
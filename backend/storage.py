@@ -0,0 +1,631 @@
+import abc
+import math
+import re
+import sqlite3
+import threading
+import time
+from decimal import Decimal
+
+import mysql.connector
+import mysql.connector.pooling
+from mysql.connector.constants import FieldType
+
+# Storage backends for the finance tracker.
+#
+# Routes talk to a Session: one database connection plus the users, accounts
+# and transactions repositories that run their SQL on it. MySQLStorage is
+# what production runs on; SQLiteStorage keeps everything in-process (in
+# memory by default) so the API can be exercised and benchmarked without a
+# MySQL server.
+
+
+class DuplicateEntry(Exception):
+    """Raised when an insert violates a unique constraint."""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a statement can't finish before the session's deadline."""
+
+
+# Column types mysql.connector decodes as Decimal
+DECIMAL_TYPES = (FieldType.DECIMAL, FieldType.NEWDECIMAL)
+
+# Users
+CREATE_USER = "INSERT INTO users (username, email, password) VALUES (%s, %s, %s)"
+
+FIND_USER_BY_LOGIN = """
+    SELECT id, username, email, password FROM users
+    WHERE username = %s OR email = %s
+    ORDER BY id
+    LIMIT 1
+"""
+
+
+class UserRepository:
+    def __init__(self, session):
+        self.session = session
+
+    def create(self, username, email, password):
+        return self.session.insert(CREATE_USER, (username, email, password))
+
+    def find_by_login(self, username_or_email):
+        return self.session.fetchone(
+            FIND_USER_BY_LOGIN, (username_or_email, username_or_email)
+        )
+
+
+# Accounts
+CREATE_ACCOUNT = "INSERT INTO accounts (user_id, name, balance) VALUES (%s, %s, %s)"
+
+LIST_ACCOUNTS = """
+    SELECT id, name, balance, created_at FROM accounts
+    WHERE user_id = %s
+    ORDER BY id
+"""
+
+FIRST_ACCOUNT = """
+    SELECT id, balance FROM accounts
+    WHERE user_id = %s
+    ORDER BY id
+    LIMIT 1
+"""
+
+GET_OWNED_ACCOUNT = "SELECT id, balance FROM accounts WHERE id = %s AND user_id = %s"
+
+TOTAL_BALANCE = "SELECT SUM(balance) AS total_balance FROM accounts WHERE user_id = %s"
+
+RENAME_ACCOUNT = "UPDATE accounts SET name = %s WHERE id = %s AND user_id = %s"
+
+SET_BALANCE = "UPDATE accounts SET balance = %s WHERE id = %s"
+
+ADJUST_BALANCE = "UPDATE accounts SET balance = balance + %s WHERE id = %s"
+
+DELETE_ACCOUNT = "DELETE FROM accounts WHERE id = %s AND user_id = %s"
+
+
+class AccountRepository:
+    def __init__(self, session):
+        self.session = session
+
+    def create(self, user_id, name, balance):
+        return self.session.insert(CREATE_ACCOUNT, (user_id, name, balance))
+
+    def list_for_user(self, user_id):
+        return self.session.fetchall(LIST_ACCOUNTS, (user_id,))
+
+    def first_for_user(self, user_id):
+        return self.session.fetchone(FIRST_ACCOUNT, (user_id,))
+
+    def get_owned(self, account_id, user_id):
+        return self.session.fetchone(GET_OWNED_ACCOUNT, (account_id, user_id))
+
+    def total_balance(self, user_id):
+        return self.session.fetchone(TOTAL_BALANCE, (user_id,))["total_balance"]
+
+    def rename(self, account_id, user_id, name):
+        return self.session.execute(RENAME_ACCOUNT, (name, account_id, user_id))
+
+    def set_balance(self, account_id, balance):
+        return self.session.execute(SET_BALANCE, (balance, account_id))
+
+    def adjust_balance(self, account_id, delta):
+        return self.session.execute(ADJUST_BALANCE, (delta, account_id))
+
+    def delete(self, account_id, user_id):
+        return self.session.execute(DELETE_ACCOUNT, (account_id, user_id))
+
+
+# Transactions
+CREATE_TRANSACTION = """
+    INSERT INTO transactions
+    (user_id, account_id, type, amount, description, transfer_to_account_id)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+SELECT_TRANSACTIONS = """
+    SELECT t.*, a.name as account_name,
+    CASE WHEN t.transfer_to_account_id IS NOT NULL THEN a2.name ELSE NULL END as transfer_to_account_name
+    FROM transactions t
+    JOIN accounts a ON t.account_id = a.id
+    LEFT JOIN accounts a2 ON t.transfer_to_account_id = a2.id
+"""
+
+LIST_TRANSACTIONS = SELECT_TRANSACTIONS + """
+    WHERE t.user_id = %s
+    ORDER BY t.created_at DESC
+"""
+
+LIST_ACCOUNT_TRANSACTIONS = SELECT_TRANSACTIONS + """
+    WHERE t.user_id = %s AND t.account_id = %s
+    ORDER BY t.created_at DESC
+"""
+
+RECENT_TRANSACTIONS = SELECT_TRANSACTIONS + """
+    WHERE t.user_id = %s
+    ORDER BY t.created_at DESC
+    LIMIT %s
+"""
+
+GET_TRANSACTION_WITH_BALANCES = """
+    SELECT t.*, a.balance as source_balance,
+    CASE WHEN t.transfer_to_account_id IS NOT NULL THEN a2.balance ELSE NULL END as dest_balance
+    FROM transactions t
+    JOIN accounts a ON t.account_id = a.id
+    LEFT JOIN accounts a2 ON t.transfer_to_account_id = a2.id
+    WHERE t.id = %s AND t.user_id = %s
+"""
+
+DELETE_TRANSACTION = "DELETE FROM transactions WHERE id = %s"
+
+# Filled in with the session's month/year expressions
+MONTHLY_SUMMARY = """
+    SELECT
+        {month} as month,
+        {year} as year,
+        type,
+        SUM(amount) as total
+    FROM transactions
+    WHERE user_id = %s AND type IN ('income', 'expense')
+    GROUP BY {year}, {month}, type
+    ORDER BY {year} DESC, {month} DESC
+    LIMIT 12
+"""
+
+
+class TransactionRepository:
+    def __init__(self, session):
+        self.session = session
+        # Built once per session so the statement cache sees the same text
+        self.monthly_summary_sql = MONTHLY_SUMMARY.format(
+            month=session.MONTH.format("created_at"),
+            year=session.YEAR.format("created_at"),
+        )
+
+    def create(
+        self,
+        user_id,
+        account_id,
+        transaction_type,
+        amount,
+        description,
+        transfer_to_account_id=None,
+    ):
+        return self.session.insert(
+            CREATE_TRANSACTION,
+            (
+                user_id,
+                account_id,
+                transaction_type,
+                amount,
+                description,
+                transfer_to_account_id,
+            ),
+        )
+
+    def list_for_user(self, user_id, account_id=None):
+        if account_id:
+            return self.session.fetchall(
+                LIST_ACCOUNT_TRANSACTIONS, (user_id, account_id)
+            )
+        return self.session.fetchall(LIST_TRANSACTIONS, (user_id,))
+
+    def recent_for_user(self, user_id, limit):
+        return self.session.fetchall(RECENT_TRANSACTIONS, (user_id, limit))
+
+    def get_with_balances(self, transaction_id, user_id):
+        return self.session.fetchone(
+            GET_TRANSACTION_WITH_BALANCES, (transaction_id, user_id)
+        )
+
+    def delete(self, transaction_id):
+        return self.session.execute(DELETE_TRANSACTION, (transaction_id,))
+
+    def monthly_summary(self, user_id):
+        return self.session.fetchall(self.monthly_summary_sql, (user_id,))
+
+
+class Session(abc.ABC):
+    """A database connection and the repositories that use it."""
+
+    # SQL for the month and year of a timestamp column
+    MONTH = "MONTH({})"
+    YEAR = "YEAR({})"
+
+    SCHEMA = ()
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.deadline = None
+        self.users = UserRepository(self)
+        self.accounts = AccountRepository(self)
+        self.transactions = TransactionRepository(self)
+
+    def create_tables(self):
+        cursor = self.conn.cursor()
+        try:
+            for statement in self.SCHEMA:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+        self.commit()
+
+    def fetchone(self, sql, params=()):
+        rows = self.fetchall(sql, params)
+        return rows[0] if rows else None
+
+    @abc.abstractmethod
+    def fetchall(self, sql, params=()):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def execute(self, sql, params=()):
+        """Run a statement and return the number of affected rows."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def insert(self, sql, params=()):
+        """Run an INSERT and return the new row's id."""
+        raise NotImplementedError
+
+    def set_deadline(self, deadline):
+        """Stop running statements once ``time.monotonic()`` passes ``deadline``."""
+        self.deadline = deadline
+
+    def _remaining(self):
+        if self.deadline is None:
+            return None
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded("Request deadline exceeded")
+        return remaining
+
+    @abc.abstractmethod
+    def begin(self):
+        raise NotImplementedError
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def close(self):
+        self.conn.close()
+
+
+class MySQLSession(Session):
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(50) UNIQUE NOT NULL,
+            email VARCHAR(100) UNIQUE NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS accounts (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            name VARCHAR(100) NOT NULL,
+            balance DECIMAL(15, 2) NOT NULL DEFAULT 0.00,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            account_id INT NOT NULL,
+            type ENUM('income', 'expense', 'transfer') NOT NULL,
+            amount DECIMAL(15, 2) NOT NULL,
+            description VARCHAR(255),
+            transfer_to_account_id INT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            FOREIGN KEY (account_id) REFERENCES accounts(id) ON DELETE CASCADE,
+            FOREIGN KEY (transfer_to_account_id) REFERENCES accounts(id) ON DELETE SET NULL
+        )
+        """,
+    )
+
+    # Server errors meaning the statement ran out of time: max_execution_time
+    # exceeded and lock wait timeout
+    TIMEOUT_ERRORS = (3024, 1205)
+
+    # How far the server-side timeout may lag behind the remaining budget
+    # before it is set again
+    TIMEOUT_SLACK = 0.05
+
+    def __init__(self, conn, statements=None, on_release=None):
+        super().__init__(conn)
+        # One prepared cursor per statement, so each statement is prepared
+        # on the server once per connection and only executed afterwards.
+        # Pooled connections keep theirs from one session to the next.
+        self._statements = statements if statements is not None else PreparedStatements()
+        # Called once a pooled connection is back in the pool
+        self._on_release = on_release
+
+    def _run(self, sql, params):
+        self._apply_timeout(self._remaining())
+
+        cursors = self._statements.cursors
+        if sql not in cursors:
+            cursors[sql] = (sql, self.conn.cursor(prepared=True))
+        # The cursor only skips re-preparing when handed the same string object
+        sql, cursor = cursors[sql]
+        try:
+            cursor.execute(sql, params)
+        except mysql.connector.Error as err:
+            if err.errno == 1062:  # Duplicate entry error
+                raise DuplicateEntry(str(err)) from err
+            if err.errno in self.TIMEOUT_ERRORS:
+                raise DeadlineExceeded(str(err)) from err
+            raise
+        return cursor
+
+    def fetchall(self, sql, params=()):
+        cursor = self._run(sql, params)
+        columns = cursor.column_names
+        # Without the C extension, prepared statements return DECIMAL
+        # columns as strings; turn them back into Decimal like plain cursors
+        decimals = [
+            index
+            for index, column in enumerate(cursor.description)
+            if column[1] in DECIMAL_TYPES
+        ]
+        rows = []
+        for row in cursor.fetchall():
+            row = list(row)
+            for index in decimals:
+                if isinstance(row[index], bytes):
+                    row[index] = row[index].decode()
+                if isinstance(row[index], str):
+                    row[index] = Decimal(row[index])
+            rows.append(dict(zip(columns, row)))
+        return rows
+
+    def execute(self, sql, params=()):
+        return self._run(sql, params).rowcount
+
+    def insert(self, sql, params=()):
+        return self._run(sql, params).lastrowid
+
+    def _apply_timeout(self, remaining):
+        # The server timeout applies to each statement in full, so it has to
+        # shrink along with the budget. Skip the round trip while the value
+        # set on this connection is at most TIMEOUT_SLACK above it; one left
+        # by an earlier session on a pooled connection may be far off.
+        timeout = self._statements.timeout
+        if remaining is None:
+            if timeout is None:
+                return
+            values = ("DEFAULT", "DEFAULT")
+        else:
+            if timeout is not None and 0 <= timeout - remaining <= self.TIMEOUT_SLACK:
+                return
+            # max_execution_time bounds SELECTs, innodb_lock_wait_timeout
+            # bounds writes stuck behind row locks (whole seconds, minimum 1)
+            values = (max(int(remaining * 1000), 1), max(math.ceil(remaining), 1))
+
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(
+                "SET SESSION max_execution_time = %s, innodb_lock_wait_timeout = %s"
+                % values
+            )
+        finally:
+            cursor.close()
+        self._statements.timeout = remaining
+
+    def begin(self):
+        self.conn.start_transaction()
+
+    def close(self):
+        pooled = self._on_release is not None
+        try:
+            if pooled:
+                # Back to the pool, prepared statements included; end any
+                # transaction a read left open first
+                self.conn.rollback()
+            else:
+                for _, cursor in self._statements.cursors.values():
+                    cursor.close()
+        except mysql.connector.Error:
+            # The connection broke; the request's outcome is already decided.
+            # Drop it so the pool reconnects it on its next checkout.
+            if pooled:
+                self._statements.cursors.clear()
+                self._statements.timeout = None
+                self.conn.disconnect()
+        finally:
+            try:
+                self.conn.close()
+            finally:
+                if pooled:
+                    self._on_release()
+
+
+class PreparedStatements:
+    """The prepared cursors of one server connection, and the statement
+    timeout last set on it."""
+
+    def __init__(self):
+        self.cursors = {}
+        self.timeout = None
+
+
+class MySQLStorage:
+    def __init__(self, config, pool_size=32):
+        self.config = config
+        self.pool_size = pool_size
+        self._pool = None
+        self._lock = threading.Lock()
+        # Notified whenever a connection goes back to the pool
+        self._released = threading.Condition()
+        # Keyed by server connection id, which changes if the pool reconnects
+        self._statements = {}
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = mysql.connector.pooling.MySQLConnectionPool(
+                    pool_name="finance",
+                    pool_size=self.pool_size,
+                    # Resetting the session would deallocate the prepared
+                    # statements kept with each connection
+                    pool_reset_session=False,
+                    **self.config,
+                )
+            return self._pool
+
+    def _release(self):
+        with self._released:
+            self._released.notify()
+
+    def connect(self, deadline=None):
+        """Check a connection out of the pool, waiting for one to be released
+        until ``deadline`` if all of them are in use."""
+        pool = self._get_pool()
+        with self._released:
+            while True:
+                try:
+                    conn = pool.get_connection()
+                    break
+                except mysql.connector.errors.PoolError:
+                    # The pool itself doesn't wait when it is exhausted
+                    if deadline is None:
+                        self._released.wait()
+                        continue
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise DeadlineExceeded("No database connection became free")
+                    self._released.wait(remaining)
+
+        with self._lock:
+            statements = self._statements.setdefault(
+                conn.connection_id, PreparedStatements()
+            )
+        return MySQLSession(conn, statements, on_release=self._release)
+
+
+def parse_decimal(value):
+    # SQLite stores DECIMAL columns as REAL; round back to cents
+    return Decimal(value.decode()).quantize(Decimal("0.01"))
+
+
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_converter("DECIMAL", parse_decimal)
+
+PARAM = re.compile(r"%s")
+
+
+class SQLiteSession(Session):
+    MONTH = "CAST(strftime('%m', {}) AS INTEGER)"
+    YEAR = "CAST(strftime('%Y', {}) AS INTEGER)"
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username VARCHAR(50) UNIQUE NOT NULL,
+            email VARCHAR(100) UNIQUE NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS accounts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            name VARCHAR(100) NOT NULL,
+            balance DECIMAL(15, 2) NOT NULL DEFAULT 0.00,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            account_id INTEGER NOT NULL,
+            type TEXT NOT NULL CHECK (type IN ('income', 'expense', 'transfer')),
+            amount DECIMAL(15, 2) NOT NULL,
+            description VARCHAR(255),
+            transfer_to_account_id INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            FOREIGN KEY (account_id) REFERENCES accounts(id) ON DELETE CASCADE,
+            FOREIGN KEY (transfer_to_account_id) REFERENCES accounts(id) ON DELETE SET NULL
+        )
+        """,
+    )
+
+    def __init__(self, conn):
+        super().__init__(conn)
+        self._statements = {}
+
+    def _run(self, sql, params):
+        self._remaining()
+
+        # sqlite3 keeps its own prepared statement cache; only the
+        # placeholder style needs translating, once per statement
+        if sql not in self._statements:
+            self._statements[sql] = PARAM.sub("?", sql)
+        try:
+            return self.conn.execute(self._statements[sql], params)
+        except sqlite3.IntegrityError as err:
+            if "UNIQUE" in str(err):
+                raise DuplicateEntry(str(err)) from err
+            raise
+        except sqlite3.OperationalError as err:
+            # Raised when the progress handler aborts a statement
+            if "interrupted" in str(err):
+                raise DeadlineExceeded(str(err)) from err
+            raise
+
+    def fetchall(self, sql, params=()):
+        cursor = self._run(sql, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def execute(self, sql, params=()):
+        return self._run(sql, params).rowcount
+
+    def insert(self, sql, params=()):
+        return self._run(sql, params).lastrowid
+
+    def set_deadline(self, deadline):
+        super().set_deadline(deadline)
+        # Interrupts the running statement once the deadline has passed
+        self.conn.set_progress_handler(lambda: time.monotonic() > deadline, 1000)
+
+    def begin(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+
+
+class SQLiteStorage:
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self.uri = False
+        self._keep_alive = None
+        if path == ":memory:":
+            # A named shared-cache database, so every connection sees the same
+            # data; it lives as long as one connection to it stays open
+            self.path = f"file:finance-{id(self)}?mode=memory&cache=shared"
+            self.uri = True
+            self._keep_alive = sqlite3.connect(self.path, uri=True)
+
+    def connect(self, deadline=None):
+        # Connections are opened on demand, so there is nothing to wait for
+        conn = sqlite3.connect(
+            self.path,
+            uri=self.uri,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            # Autocommit unless a transaction is opened with begin()
+            isolation_level=None,
+        )
+        conn.execute("PRAGMA foreign_keys = ON")
+        return SQLiteSession(conn)
@@ -0,0 +1,125 @@
+import threading
+import time
+
+import pytest
+
+from app import (
+    ADMISSION_GATES,
+    MAX_IN_FLIGHT,
+    RequestRejected,
+    admission_lock,
+    admission_state,
+)
+
+pytestmark = pytest.mark.usefixtures("reset_admission")
+
+READ = ADMISSION_GATES["get_accounts"]
+WRITE = ADMISSION_GATES["create_transaction"]
+REPORT = ADMISSION_GATES["get_dashboard_data"]
+
+
+def fill(gate):
+    gate.in_flight = gate.max_concurrent
+    admission_state["in_flight"] += gate.max_concurrent
+
+
+def wait_until(condition, timeout=2):
+    stop = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < stop, "timed out"
+        time.sleep(0.005)
+
+
+def acquire_in_thread(gate, budget, results):
+    def run():
+        try:
+            gate.acquire(time.monotonic() + budget)
+            results.append("admitted")
+        except RequestRejected as e:
+            results.append(e.status)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_queued_request_runs_once_a_slot_frees():
+    fill(READ)
+    results = []
+    thread = acquire_in_thread(READ, 2, results)
+    wait_until(lambda: READ.queued == 1)
+
+    READ.release()
+    thread.join()
+
+    assert results == ["admitted"]
+    assert READ.queued == 0
+    assert READ.in_flight == READ.max_concurrent
+
+
+def test_full_queue_rejects_with_429():
+    fill(READ)
+    READ.queued = READ.max_queue
+
+    with pytest.raises(RequestRejected) as rejected:
+        READ.acquire(time.monotonic() + 1)
+
+    assert rejected.value.status == 429
+    assert READ.shed == 1
+
+
+def test_queue_wait_gives_up_after_half_the_budget():
+    fill(READ)
+    start = time.monotonic()
+
+    with pytest.raises(RequestRejected) as rejected:
+        READ.acquire(start + 0.4)
+
+    waited = time.monotonic() - start
+    assert rejected.value.status == 503
+    assert 0.18 <= waited < 0.35
+    assert READ.queued == 0
+
+
+def test_priority_shares_of_global_capacity():
+    # Reports are shed first, then writes; reads may use all of it
+    admission_state["in_flight"] = int(MAX_IN_FLIGHT * 0.75)
+
+    assert READ._can_run()
+    assert not WRITE._can_run()
+    assert not REPORT._can_run()
+
+
+def test_queued_read_goes_before_writes():
+    admission_state["in_flight"] = MAX_IN_FLIGHT
+    results = []
+    read = acquire_in_thread(READ, 2, results)
+    wait_until(lambda: READ.queued == 1)
+
+    read_admitted_first = []
+
+    def write():
+        WRITE.acquire(time.monotonic() + 2)
+        read_admitted_first.append(READ.admitted == 1)
+
+    with admission_lock:
+        admission_state["in_flight"] = 0
+        # Capacity is free, but the queued read gets it first
+        assert not WRITE._can_run()
+        admission_lock.notify_all()
+    writer = threading.Thread(target=write)
+    writer.start()
+    read.join()
+    writer.join()
+
+    assert results == ["admitted"]
+    assert read_admitted_first == [True]
+
+
+def test_read_waiting_on_its_own_limit_does_not_hold_back_writes():
+    fill(READ)
+    READ.queued = 1
+
+    # More global capacity would not help the read, so writes go ahead
+    assert WRITE._can_run()
+
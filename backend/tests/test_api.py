@@ -0,0 +1,385 @@
+import itertools
+import sqlite3
+import time
+
+import pytest
+
+import app as api
+from app import ADMISSION_GATES, app
+from storage import AccountRepository, SQLiteSession
+
+pytestmark = pytest.mark.usefixtures("reset_admission")
+
+usernames = (f"user{n}" for n in itertools.count())
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+def register(client, username=None, password="secret"):
+    username = username or next(usernames)
+    return client.post(
+        "/api/register",
+        json={"username": username, "email": f"{username}@example.com", "password": password},
+    )
+
+
+@pytest.fixture
+def user(client):
+    tokens = register(client).get_json()["tokens"]
+    return {
+        "headers": {"Authorization": f"Bearer {tokens['access']}"},
+        "account_id": tokens["account_id"],
+    }
+
+
+def balances(client, user):
+    response = client.get("/api/accounts", headers=user["headers"])
+    return {a["id"]: a["balance"] for a in response.get_json()["accounts"]}
+
+
+def create_account(client, user, name, balance):
+    response = client.post(
+        "/api/accounts", json={"name": name, "balance": balance}, headers=user["headers"]
+    )
+    assert response.status_code == 201
+    return response.get_json()["account_id"]
+
+
+def create_transaction(client, user, **body):
+    return client.post("/api/transactions", json=body, headers=user["headers"])
+
+
+def test_register_and_login(client):
+    response = register(client, "alice", "hunter2")
+    assert response.status_code == 201
+    tokens = response.get_json()["tokens"]
+    assert tokens["username"] == "alice"
+    assert tokens["balance"] == 0
+
+    response = client.post(
+        "/api/login", json={"username": "alice@example.com", "password": "hunter2"}
+    )
+    assert response.status_code == 200
+    assert response.get_json()["tokens"]["account_id"] == tokens["account_id"]
+
+    response = client.post("/api/login", json={"username": "alice", "password": "nope"})
+    assert response.status_code == 401
+
+
+def test_register_duplicate_username(client):
+    assert register(client, "bob").status_code == 201
+    assert register(client, "bob").status_code == 409
+
+
+def test_account_initial_balance_is_recorded(client, user):
+    account_id = create_account(client, user, "Savings", "250.50")
+
+    assert balances(client, user)[account_id] == 250.5
+    response = client.get(
+        f"/api/transactions?account_id={account_id}", headers=user["headers"]
+    )
+    [transaction] = response.get_json()["transactions"]
+    assert transaction["type"] == "income"
+    assert transaction["amount"] == 250.5
+
+
+def test_transactions_move_balances(client, user):
+    source = create_account(client, user, "Checking", "100.00")
+    destination = user["account_id"]
+
+    response = create_transaction(
+        client, user, account_id=source, type="income", amount="20.25"
+    )
+    assert response.status_code == 201
+    response = create_transaction(
+        client, user, account_id=source, type="expense", amount="10.25"
+    )
+    assert response.status_code == 201
+    response = create_transaction(
+        client,
+        user,
+        account_id=source,
+        type="transfer",
+        amount="60",
+        transfer_to_account_id=destination,
+    )
+    assert response.status_code == 201
+
+    assert balances(client, user) == {source: 50.0, destination: 60.0}
+
+
+def test_expense_over_balance_is_rejected(client, user):
+    account_id = create_account(client, user, "Wallet", "5.00")
+
+    response = create_transaction(
+        client, user, account_id=account_id, type="expense", amount="5.01"
+    )
+
+    assert response.status_code == 400
+    assert balances(client, user)[account_id] == 5.0
+
+
+def test_deleting_transactions_reverses_them(client, user):
+    source = create_account(client, user, "Checking", "100.00")
+    destination = user["account_id"]
+    expense = create_transaction(
+        client, user, account_id=source, type="expense", amount="30"
+    ).get_json()["transaction_id"]
+    transfer = create_transaction(
+        client,
+        user,
+        account_id=source,
+        type="transfer",
+        amount="20",
+        transfer_to_account_id=destination,
+    ).get_json()["transaction_id"]
+    assert balances(client, user) == {source: 50.0, destination: 20.0}
+
+    for transaction_id in (expense, transfer):
+        response = client.delete(
+            f"/api/transactions/{transaction_id}", headers=user["headers"]
+        )
+        assert response.status_code == 200
+
+    assert balances(client, user) == {source: 100.0, destination: 0.0}
+
+
+def test_batch_runs_in_order(client, user):
+    account_id = user["account_id"]
+    response = client.post(
+        "/api/batch",
+        json={
+            "requests": [
+                {"method": "GET", "path": "/api/accounts"},
+                {
+                    "method": "POST",
+                    "path": "/api/transactions",
+                    "body": {"account_id": account_id, "type": "income", "amount": "40"},
+                },
+                {"method": "GET", "path": "/api/accounts"},
+                {"method": "GET", "path": f"/api/transactions?account_id={account_id}"},
+            ]
+        },
+        headers=user["headers"],
+    )
+
+    assert response.status_code == 200
+    before, created, after, transactions = response.get_json()["responses"]
+    assert [r["status"] for r in (before, created, after, transactions)] == [
+        200,
+        201,
+        200,
+        200,
+    ]
+    assert before["body"]["accounts"][0]["balance"] == 0
+    assert after["body"]["accounts"][0]["balance"] == 40
+    assert len(transactions["body"]["transactions"]) == 1
+
+
+def test_batch_reports_errors_per_entry(client, user):
+    response = client.post(
+        "/api/batch",
+        json={
+            "requests": [
+                {"method": "GET", "path": "/api/missing"},
+                {"method": "POST", "path": "/api/login", "body": {}},
+                {
+                    "method": "POST",
+                    "path": "/api/transactions",
+                    "body": {"account_id": user["account_id"], "type": "expense", "amount": "1"},
+                },
+                {"method": "GET", "path": "/api/accounts"},
+            ]
+        },
+        headers=user["headers"],
+    )
+
+    assert response.status_code == 200
+    statuses = [r["status"] for r in response.get_json()["responses"]]
+    assert statuses == [404, 400, 400, 200]
+
+
+def test_batch_lane_connection_failure_fails_only_its_entries(
+    client, user, monkeypatch
+):
+    connect = api.storage.connect
+    calls = []
+
+    def flaky_connect(deadline=None):
+        calls.append(1)
+        if len(calls) > 1:
+            raise ConnectionError("connection refused")
+        return connect(deadline)
+
+    monkeypatch.setattr(api.storage, "connect", flaky_connect)
+    response = client.post(
+        "/api/batch",
+        json={
+            "requests": [
+                {
+                    "method": "POST",
+                    "path": "/api/transactions",
+                    "body": {"account_id": user["account_id"], "type": "income", "amount": "40"},
+                },
+                {"method": "GET", "path": "/api/accounts"},
+                {"method": "GET", "path": "/api/transactions"},
+            ]
+        },
+        headers=user["headers"],
+    )
+    monkeypatch.undo()
+
+    # The committed write is still reported, so a client won't retry it
+    assert response.status_code == 200
+    created, accounts, transactions = response.get_json()["responses"]
+    assert created["status"] == 201
+    assert accounts["status"] == 200
+    assert transactions == {"status": 500, "body": {"error": "connection refused"}}
+    assert balances(client, user)[user["account_id"]] == 40.0
+
+
+def test_batch_rejects_bad_payloads(client, user):
+    for payload in ({}, [1], {"requests": []}, {"requests": [{"method": "GET"}]}):
+        response = client.post("/api/batch", json=payload, headers=user["headers"])
+        assert response.status_code == 400
+
+    too_many = [{"path": "/api/accounts"}] * (api.BATCH_MAX_REQUESTS + 1)
+    response = client.post(
+        "/api/batch", json={"requests": too_many}, headers=user["headers"]
+    )
+    assert response.status_code == 400
+
+
+def test_full_route_sheds_with_429(client, user):
+    gate = ADMISSION_GATES["get_dashboard_data"]
+    gate.in_flight = gate.max_concurrent
+    gate.queued = gate.max_queue
+
+    response = client.get("/api/dashboard", headers=user["headers"])
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(gate.retry_after)
+    assert gate.shed == 1
+
+
+def test_batch_sub_requests_go_through_their_gate(client, user):
+    gate = ADMISSION_GATES["get_dashboard_data"]
+    gate.in_flight = gate.max_concurrent
+    gate.queued = gate.max_queue
+
+    response = client.post(
+        "/api/batch",
+        json={"requests": [{"path": "/api/dashboard"}, {"path": "/api/accounts"}]},
+        headers=user["headers"],
+    )
+
+    assert response.status_code == 200
+    dashboard, accounts = response.get_json()["responses"]
+    assert dashboard["status"] == 429
+    assert dashboard["retry_after"] == gate.retry_after
+    assert accounts["status"] == 200
+    assert ADMISSION_GATES["get_accounts"].in_flight == 0
+
+
+def test_exhausted_budget_sheds_with_503(client, user):
+    response = client.get(
+        "/api/accounts", headers={**user["headers"], "X-Request-Timeout": "0"}
+    )
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    assert ADMISSION_GATES["get_accounts"].in_flight == 0
+
+
+def test_admission_stats(client, user):
+    client.get("/api/accounts", headers=user["headers"])
+
+    stats = client.get("/api/admission").get_json()
+
+    assert stats["in_flight"] == 0
+    assert stats["max_in_flight"] == api.MAX_IN_FLIGHT
+    assert stats["routes"]["get_accounts"]["admitted"] == 1
+    assert stats["routes"]["get_accounts"]["in_flight"] == 0
+
+
+# Never finishes within a test's budget; SQLite's progress handler has to
+# interrupt it
+SLOW_QUERY = """
+    WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n LIMIT 1000000000)
+    SELECT COUNT(*) AS count FROM n
+"""
+
+
+def slow_list_for_user(self, user_id):
+    return self.session.fetchall(SLOW_QUERY)
+
+
+def test_statement_past_deadline_sheds_with_503(client, user, monkeypatch):
+    monkeypatch.setattr(AccountRepository, "list_for_user", slow_list_for_user)
+    gate = ADMISSION_GATES["get_accounts"]
+
+    start = time.monotonic()
+    response = client.get(
+        "/api/accounts", headers={**user["headers"], "X-Request-Timeout": "200"}
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(gate.retry_after)
+    assert time.monotonic() - start < 2
+    assert gate.in_flight == 0
+
+
+def test_batch_entry_past_deadline_keeps_retry_after(client, user, monkeypatch):
+    monkeypatch.setattr(AccountRepository, "list_for_user", slow_list_for_user)
+    gate = ADMISSION_GATES["get_accounts"]
+
+    response = client.post(
+        "/api/batch",
+        json={"requests": [{"path": "/api/accounts"}]},
+        headers={**user["headers"], "X-Request-Timeout": "200"},
+    )
+
+    assert response.status_code == 200
+    [entry] = response.get_json()["responses"]
+    assert entry["status"] == 503
+    assert entry["retry_after"] == gate.retry_after
+
+
+def test_batch_sub_request_gets_its_route_budget(client, user, monkeypatch):
+    budgets = []
+
+    def record_budget(self, user_id):
+        budgets.append(self.session.deadline - time.monotonic())
+        return []
+
+    monkeypatch.setattr(AccountRepository, "list_for_user", record_budget)
+    client.get("/api/accounts", headers=user["headers"])
+    client.post(
+        "/api/batch",
+        json={"requests": [{"path": "/api/accounts"}]},
+        headers=user["headers"],
+    )
+
+    direct, batched = budgets
+    route_budget = ADMISSION_GATES["get_accounts"].budget
+    assert ADMISSION_GATES["batch"].budget > route_budget
+    assert direct <= route_budget
+    assert batched <= route_budget
+
+
+def test_batch_survives_a_failing_rollback(client, user, monkeypatch):
+    def broken_rollback(self):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(SQLiteSession, "rollback", broken_rollback)
+    response = client.post(
+        "/api/batch",
+        json={"requests": [{"path": "/api/accounts"}, {"path": "/api/transactions"}]},
+        headers=user["headers"],
+    )
+
+    assert response.status_code == 200
+    assert [r["status"] for r in response.get_json()["responses"]] == [200, 200]
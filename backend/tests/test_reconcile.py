@@ -0,0 +1,195 @@
+import numpy as np
+import pytest
+
+import reconcile
+from reconcile import (
+    TYPE_EXPENSE,
+    TYPE_INCOME,
+    TYPE_TRANSFER,
+    Reconciliation,
+    format_cents,
+    repair,
+)
+
+
+def accounts(*rows):
+    # id, user_id, balance in cents
+    return np.array(rows, dtype=np.int64)
+
+
+def transactions(*rows):
+    # id, user_id, account_id, transfer_to_account_id, type, amount in cents
+    return np.array(rows, dtype=np.int64)
+
+
+def test_recomputes_income_expense_and_transfers():
+    result = Reconciliation(max_account_id=3, sample_size=10)
+    result.add_accounts(accounts([1, 10, 5000], [2, 10, 2000], [3, 11, 0]))
+    result.add_transactions(
+        transactions(
+            [1, 10, 1, 0, TYPE_INCOME, 10000],
+            [2, 10, 1, 0, TYPE_EXPENSE, 3000],
+            [3, 10, 1, 2, TYPE_TRANSFER, 2000],
+        )
+    )
+
+    ids, recorded, expected = result.mismatches()
+    assert ids.tolist() == []
+    assert result.expected[1:].tolist() == [5000, 2000, 0]
+    assert result.transaction_count == 3
+
+
+def test_chunks_add_up_like_one_pass():
+    rows = transactions(
+        [1, 10, 1, 0, TYPE_INCOME, 700],
+        [2, 10, 1, 2, TYPE_TRANSFER, 200],
+        [3, 10, 2, 0, TYPE_EXPENSE, 50],
+        [4, 10, 1, 0, TYPE_INCOME, 5],
+    )
+    whole = Reconciliation(2, 10)
+    whole.add_transactions(rows)
+    chunked = Reconciliation(2, 10)
+    for start in range(0, len(rows), 3):
+        chunked.add_transactions(rows[start : start + 3])
+
+    assert chunked.expected.tolist() == whole.expected.tolist()
+
+
+def test_reports_mismatches_and_negative_balances():
+    result = Reconciliation(2, 10)
+    result.add_accounts(accounts([1, 10, 1000], [2, 10, 0]))
+    result.add_transactions(
+        transactions([1, 10, 1, 0, TYPE_INCOME, 900], [2, 10, 2, 0, TYPE_EXPENSE, 5])
+    )
+
+    ids, recorded, expected = result.mismatches()
+    assert ids.tolist() == [1, 2]
+    assert recorded.tolist() == [1000, 0]
+    assert expected.tolist() == [900, -5]
+    assert result.negative_accounts().tolist() == [2]
+
+
+def test_flags_anomalies():
+    result = Reconciliation(3, 10)
+    result.add_accounts(accounts([1, 10, 0], [2, 10, 0], [3, 11, 0]))
+    result.add_transactions(
+        transactions(
+            [1, 11, 1, 0, TYPE_INCOME, 100],  # not the owner's account
+            [2, 10, 1, 3, TYPE_TRANSFER, 100],  # into another user's account
+            [3, 10, 1, 1, TYPE_TRANSFER, 100],  # into itself
+            [4, 10, 2, 0, TYPE_TRANSFER, 100],  # destination deleted
+            [5, 10, 2, 0, TYPE_EXPENSE, 0],
+        )
+    )
+
+    assert result.anomaly_samples == {
+        "owner_mismatch": [1],
+        "cross_user_transfer": [2],
+        "self_transfer": [3],
+        "orphan_transfer": [4],
+        "non_positive_amount": [5],
+    }
+
+
+def test_anomaly_samples_are_capped():
+    result = Reconciliation(1, 2)
+    result.add_accounts(accounts([1, 10, 0]))
+    result.add_transactions(
+        transactions(*[[i, 10, 1, 0, TYPE_EXPENSE, 0] for i in range(1, 6)])
+    )
+
+    assert result.anomaly_counts["non_positive_amount"] == 5
+    assert result.anomaly_samples["non_positive_amount"] == [1, 2]
+
+
+def test_format_cents():
+    assert format_cents(0) == "0.00"
+    assert format_cents(5) == "0.05"
+    assert format_cents(-123456) == "-1234.56"
+
+
+class FakeCursor:
+    def __init__(self, stale_ids):
+        self.stale_ids = stale_ids
+        self.statements = []
+        self.rowcount = 0
+
+    def execute(self, sql, params=()):
+        self.statements.append((" ".join(sql.split()), params))
+        if sql.startswith("UPDATE"):
+            self.rowcount = 0 if params[1] in self.stale_ids else 1
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = 0
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_repair_records_each_adjustment_and_skips_moved_balances():
+    cursor = FakeCursor(stale_ids={2})
+    conn = FakeConnection(cursor)
+
+    repaired = repair(
+        conn,
+        np.array([1, 2]),
+        np.array([1000, 50]),
+        np.array([900, 75]),
+    )
+
+    assert repaired == 1
+    adjustments = [
+        params
+        for sql, params in cursor.statements
+        if sql.startswith("INSERT INTO balance_adjustments")
+    ]
+    assert adjustments == [(1, "10.00", "9.00")]
+    assert conn.commits == 1
+
+
+@pytest.mark.parametrize(
+    "flags, repaired_ids",
+    [
+        ([], [3]),
+        (["--include-surplus"], [1, 3]),
+        (["--include-surplus", "--include-negative"], [1, 2, 3]),
+    ],
+)
+def test_repair_skips_surplus_and_negative_accounts_unless_asked(
+    monkeypatch, flags, repaired_ids
+):
+    result = Reconciliation(max_account_id=3, sample_size=10)
+    result.add_accounts(accounts([1, 10, 1000], [2, 10, 500], [3, 10, 0]))
+    result.add_transactions(
+        transactions(
+            [1, 10, 1, 0, TYPE_INCOME, 900],
+            [2, 10, 2, 0, TYPE_EXPENSE, 100],
+            [3, 10, 3, 0, TYPE_INCOME, 200],
+        )
+    )
+    cursor = FakeCursor(stale_ids=set())
+    monkeypatch.setattr(
+        reconcile.mysql.connector, "connect", lambda **config: FakeConnection(cursor)
+    )
+    monkeypatch.setattr(reconcile, "scan", lambda conn, chunk_size, limit: result)
+
+    status = reconcile.main(["--repair", *flags])
+
+    updated = [params[1] for sql, params in cursor.statements if sql.startswith("UPDATE")]
+    assert updated == repaired_ids
+    assert status == (0 if len(repaired_ids) == 3 else 1)
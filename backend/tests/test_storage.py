@@ -0,0 +1,230 @@
+import threading
+import time
+from decimal import Decimal
+
+import mysql.connector
+import pytest
+from mysql.connector.constants import FieldType
+from mysql.connector.protocol import MySQLProtocol
+
+from storage import (
+    DeadlineExceeded,
+    MySQLSession,
+    MySQLStorage,
+    PreparedStatements,
+    Session,
+)
+
+
+def field(name, type_code):
+    # name, type, display_size, internal_size, precision, scale, null_ok, flags
+    return (name, type_code, None, None, None, None, True, 0)
+
+
+def binary_row(account_id, balance, name):
+    # Binary result row as the server sends it for a prepared statement:
+    # null bitmap, then LONG as 4 little-endian bytes and length-coded strings
+    packet = bytearray([0])
+    packet += account_id.to_bytes(4, "little")
+    for text in (balance, name):
+        packet += bytes([len(text)]) + text.encode()
+    return bytes(packet)
+
+
+class FakePreparedCursor:
+    FIELDS = [
+        field("id", FieldType.LONG),
+        field("balance", FieldType.NEWDECIMAL),
+        field("name", FieldType.VAR_STRING),
+    ]
+
+    def __init__(self):
+        self.executed = []
+        self.closed = False
+
+    def execute(self, sql, params=()):
+        self.executed.append((sql, params))
+
+    @property
+    def column_names(self):
+        return tuple(f[0] for f in self.FIELDS)
+
+    @property
+    def description(self):
+        return self.FIELDS
+
+    def fetchall(self):
+        protocol = MySQLProtocol()
+        return [
+            protocol._parse_binary_values(self.FIELDS, binary_row(1, "100.00", "Main")),
+            protocol._parse_binary_values(self.FIELDS, binary_row(2, "-0.50", "Card")),
+        ]
+
+    def close(self):
+        self.closed = True
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=()):
+        self.conn.statements.append(sql)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, connection_id=1, broken=False):
+        self.connection_id = connection_id
+        self.broken = broken
+        self.prepared = []
+        self.statements = []
+        self.rolled_back = False
+        self.disconnected = False
+        self.closed = False
+
+    def cursor(self, prepared=False):
+        if prepared:
+            cursor = FakePreparedCursor()
+            self.prepared.append(cursor)
+            return cursor
+        return FakeCursor(self)
+
+    def rollback(self):
+        if self.broken:
+            raise mysql.connector.errors.OperationalError("Lost connection")
+        self.rolled_back = True
+
+    def disconnect(self):
+        self.disconnected = True
+
+    def close(self):
+        self.closed = True
+
+
+def test_prepared_rows_keep_decimal_columns_as_decimal():
+    session = MySQLSession(FakeConnection())
+
+    rows = session.fetchall("SELECT id, balance, name FROM accounts")
+
+    assert rows == [
+        {"id": 1, "balance": Decimal("100.00"), "name": "Main"},
+        {"id": 2, "balance": Decimal("-0.50"), "name": "Card"},
+    ]
+    assert all(isinstance(row["balance"], Decimal) for row in rows)
+    assert isinstance(rows[0]["id"], int)
+
+
+def test_pooled_sessions_reuse_prepared_statements():
+    conn = FakeConnection()
+    statements = PreparedStatements()
+    sql = "SELECT id, balance, name FROM accounts"
+
+    first = MySQLSession(conn, statements, on_release=lambda: None)
+    first.fetchall(sql)
+    first.close()
+
+    second = MySQLSession(conn, statements, on_release=lambda: None)
+    second.fetchall(sql)
+
+    # Prepared once, executed by both checkouts of the connection
+    assert len(conn.prepared) == 1
+    assert len(conn.prepared[0].executed) == 2
+    assert not conn.prepared[0].closed
+    assert conn.rolled_back
+
+
+def test_unpooled_session_closes_its_cursors():
+    conn = FakeConnection()
+    session = MySQLSession(conn)
+    session.fetchall("SELECT id, balance, name FROM accounts")
+    session.close()
+
+    assert conn.prepared[0].closed
+    assert conn.closed
+
+
+def test_stale_timeout_from_earlier_checkout_is_reset():
+    conn = FakeConnection()
+    statements = PreparedStatements()
+    sql = "SELECT id, balance, name FROM accounts"
+
+    # An earlier request left a short timeout on the connection
+    statements.timeout = 0.2
+    session = MySQLSession(conn, statements, on_release=lambda: None)
+    session.fetchall(sql)
+
+    assert conn.statements == [
+        "SET SESSION max_execution_time = DEFAULT, innodb_lock_wait_timeout = DEFAULT"
+    ]
+    assert statements.timeout is None
+
+
+def test_session_requires_query_methods():
+    with pytest.raises(TypeError):
+        Session(FakeConnection())
+
+
+def test_broken_pooled_connection_still_goes_back_to_the_pool():
+    conn = FakeConnection(broken=True)
+    statements = PreparedStatements()
+    released = []
+    session = MySQLSession(conn, statements, on_release=lambda: released.append(1))
+    session.fetchall("SELECT id, balance, name FROM accounts")
+
+    session.close()
+
+    # Disconnected so the pool reconnects it, and its statements dropped
+    assert conn.disconnected
+    assert conn.closed
+    assert released == [1]
+    assert statements.cursors == {}
+
+
+class FakePooledConnection(FakeConnection):
+    def __init__(self, pool, connection_id):
+        super().__init__(connection_id)
+        self.pool = pool
+
+    def close(self):
+        self.pool.free.append(self.connection_id)
+
+
+class FakePool:
+    def __init__(self, size):
+        self.free = list(range(size))
+
+    def get_connection(self):
+        if not self.free:
+            raise mysql.connector.errors.PoolError("pool exhausted")
+        return FakePooledConnection(self, self.free.pop())
+
+
+def pooled_storage(size):
+    storage = MySQLStorage({}, pool_size=size)
+    storage._pool = FakePool(size)
+    return storage
+
+
+def test_connect_waits_for_a_released_connection():
+    storage = pooled_storage(1)
+    first = storage.connect()
+    threading.Timer(0.1, first.close).start()
+
+    second = storage.connect(time.monotonic() + 2)
+
+    assert second.conn.connection_id == first.conn.connection_id
+    # Both checkouts share the connection's prepared statements
+    assert second._statements is first._statements
+
+
+def test_connect_gives_up_at_the_deadline():
+    storage = pooled_storage(1)
+    storage.connect()
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        storage.connect(start + 0.1)
+    assert time.monotonic() - start >= 0.1
@@ -151,3 +151,50 @@ export const dashboardAPI = {
     return handleResponse(response);
   },
 };
+
+
+// Batch API
+export interface BatchRequest {
+  method?: string;
+  path: string;
+  body?: unknown;
+}
+
+export interface BatchResponse {
+  status: number;
+  body: { error?: string; [key: string]: unknown };
+}
+
+export const batchAPI = {
+  send: async (token: string, requests: BatchRequest[]): Promise<BatchResponse[]> => {
+    const response = await fetch(`${API_URL}/batch`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        Authorization: `Bearer ${token}`,
+      },
+      body: JSON.stringify({ requests }),
+    });
+    const data = await handleResponse(response);
+    return data.responses;
+  },
+
+  // Accounts and transactions in one round trip instead of two
+  getAccountsAndTransactions: async (
+    token: string
+  ): Promise<[Account[], Transaction[]]> => {
+    const [accountsResult, transactionsResult] = await batchAPI.send(token, [
+      { path: '/api/accounts' },
+      { path: '/api/transactions' },
+    ]);
+    for (const result of [accountsResult, transactionsResult]) {
+      if (result.status >= 400) {
+        throw new Error(result.body.error || 'Something went wrong');
+      }
+    }
+    return [
+      accountsResult.body.accounts as Account[],
+      transactionsResult.body.transactions as Transaction[],
+    ];
+  },
+};
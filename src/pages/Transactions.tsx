@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '../context/AuthContext';
-import { accountsAPI, transactionsAPI } from '../api';
+import { batchAPI, transactionsAPI } from '../api';
 import { Account, Transaction } from '../types';
 import TransactionList from '../components/transactions/TransactionList';
 import TransactionForm from '../components/transactions/TransactionForm';
@@ -24,11 +24,8 @@ const Transactions: React.FC = () => {
         setIsLoading(true);
         setError(null);
         
-        // Fetch accounts and transactions in parallel
-        const [accountsData, transactionsData] = await Promise.all([
-          accountsAPI.getAccounts(token),
-          transactionsAPI.getTransactions(token)
-        ]);
+        // Fetch accounts and transactions in a single batched request
+        const [accountsData, transactionsData] = await batchAPI.getAccountsAndTransactions(token);
         
         setAccounts(accountsData);
         setTransactions(transactionsData);
@@ -65,10 +62,7 @@ const Transactions: React.FC = () => {
       );
       
       // Refresh data
-      const [accountsData, transactionsData] = await Promise.all([
-        accountsAPI.getAccounts(token),
-        transactionsAPI.getTransactions(token)
-      ]);
+      const [accountsData, transactionsData] = await batchAPI.getAccountsAndTransactions(token);
       
       setAccounts(accountsData);
       setTransactions(transactionsData);
@@ -96,10 +90,7 @@ const Transactions: React.FC = () => {
       await transactionsAPI.deleteTransaction(token, transactionId);
       
       // Refresh data
-      const [accountsData, transactionsData] = await Promise.all([
-        accountsAPI.getAccounts(token),
-        transactionsAPI.getTransactions(token)
-      ]);
+      const [accountsData, transactionsData] = await batchAPI.getAccountsAndTransactions(token);
       
       setAccounts(accountsData);
       setTransactions(transactionsData);